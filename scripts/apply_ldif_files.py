@@ -1,86 +1,591 @@
 #!/usr/bin/env python
 
 import os
-import subprocess
+import re
+import json
+import hashlib
 import argparse
-import yaml
+from concurrent.futures import ThreadPoolExecutor
+from ldap3 import ServerPool, Connection, ASYNC, FIRST, SUBTREE, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE
+from ldap3.core.exceptions import LDAPException
+from helx_ldap.config import load_ldap_config
+from helx_ldap.connections import ThreadConnections
+from helx_ldap.ldif import parse_records
+from helx_ldap.server import make_server
 
-def load_ldap_config(config_file="helx_ldap_config.yaml"):
+# Map LDIF modify operations to their ldap3 equivalents
+LDAP_OP_MAP = {
+    'add': MODIFY_ADD,
+    'delete': MODIFY_DELETE,
+    'replace': MODIFY_REPLACE,
+}
+
+# The root of the OpenLDAP configuration tree
+CONFIG_DN = 'cn=config'
+
+# The cn=config schema entry that schema LDIFs extend
+SCHEMA_DN = 'cn=schema,cn=config'
+
+# Matches the OID opening a schema definition, e.g. "( 2.25.1 NAME ..."
+_OID_RE = re.compile(r'\(\s*([0-9.]+)')
+
+# Number of times the server pool is cycled looking for an available server
+SERVER_POOL_CYCLES = 3
+
+# Maximum number of operations sent before waiting for their responses
+PIPELINE_DEPTH = 64
+
+# Shown by --help, here and for the helx_ldap_cli subcommand
+DESCRIPTION = 'Apply LDIF files from a directory in bottom-up order.'
+
+# Manifest, kept in the LDIF root, of the files applied to each server and their content hashes
+MANIFEST_NAME = ".ldif_applied.json"
+
+def connect_ldap_server(ldap_server_urls, bind_dn, bind_password):
     """
-    Load LDAP configuration from a YAML file.
+    Open a connection to the LDAP server and bind with the given credentials.
+
+    Several servers, e.g. the replicas of an HA deployment, can be given as a
+    comma-separated list. They form a server pool: the first available one is
+    used, and the others are tried if it cannot be reached. A single server
+    is tried once, since the pool waits between its cycles.
 
     Args:
-        config_file (str): Path to the YAML configuration file (default: helx_ldap_config.yaml).
+        ldap_server_urls (str): Comma-separated URLs of the LDAP servers (e.g., ldap://localhost).
+        bind_dn (str): The distinguished name (DN) used for binding to the LDAP server.
+        bind_password (str): The password for the DN used for binding.
 
     Returns:
-        dict: A dictionary containing the LDAP configuration data loaded from the file.
+        ldap3.Connection: A bound LDAP connection.
     """
 
-    with open(config_file, "r") as file:
-        return yaml.safe_load(file)
+    servers = [make_server(ldap_server_url.strip()) for ldap_server_url in ldap_server_urls.split(',')]
+    cycles = SERVER_POOL_CYCLES if len(servers) > 1 else 1
+    server_pool = ServerPool(servers, pool_strategy=FIRST, active=cycles, exhaust=False)
+    # The asynchronous strategy lets operations be pipelined on the connection
+    return Connection(server_pool, user=bind_dn, password=bind_password, client_strategy=ASYNC, auto_bind=True)
 
-def apply_ldif_file(ldif_file, ldap_server_url, config_dn, config_password):
+def process_add(conn, dn, entry):
     """
-    Apply a single LDIF file using the ldapmodify command.
+    Send an LDIF add record.
 
     Args:
-        ldif_file (str): The path to the LDIF file to be applied.
-        ldap_server_url (str): The URL of the LDAP server (e.g., ldap://localhost).
-        config_dn (str): The distinguished name (DN) used for binding to the LDAP server.
-        config_password (str): The password for the DN used for binding.
+        conn (ldap3.Connection): An active asynchronous LDAP connection.
+        dn (str): The DN of the entry to add.
+        entry (dict): The attributes of the entry to add.
+
+    Returns:
+        int: The message ID of the add request.
+    """
+
+    return conn.add(dn, attributes=entry)
+
+def extract_oid(definition):
+    """
+    Extract the OID from an attribute type or object class definition.
+
+    Args:
+        definition (str): A schema definition, e.g. "( 2.25.1 NAME 'foo' ... )".
+
+    Returns:
+        str or None: The OID, or None if the definition does not start with one.
+    """
+
+    match = _OID_RE.search(definition)
+    return match.group(1) if match else None
+
+def get_schema_oids(conn):
+    """
+    Return the OIDs of the attribute types and object classes known to the server.
+
+    The whole cn=schema,cn=config subtree is searched once per connection and
+    the OIDs are cached on the connection, so later lookups cost no round trip.
+    Definitions whose OID is not numeric, e.g. given by an OID macro, are left out.
+
+    Args:
+        conn (ldap3.Connection): An active LDAP connection.
+
+    Returns:
+        tuple: The set of attribute type OIDs and the set of object class OIDs.
+    """
+
+    if not hasattr(conn, '_attr_oids'):
+        attr_oids = set()
+        oc_oids = set()
+        msg_id = conn.search(SCHEMA_DN, '(objectClass=olcSchemaConfig)', search_scope=SUBTREE,
+                             attributes=['olcAttributeTypes', 'olcObjectClasses'])
+        response, result = conn.get_response(msg_id)
+        for entry in response:
+            attributes = entry.get('attributes', {})
+            attr_oids.update(extract_oid(value) for value in attributes.get('olcAttributeTypes', []))
+            oc_oids.update(extract_oid(value) for value in attributes.get('olcObjectClasses', []))
+        attr_oids.discard(None)
+        oc_oids.discard(None)
+        conn._attr_oids = attr_oids
+        conn._oc_oids = oc_oids
+    return conn._attr_oids, conn._oc_oids
+
+def attribute_type_exists(conn, attr_definition):
+    """
+    Check whether an attribute type definition is already in the server schema.
+
+    Args:
+        conn (ldap3.Connection): An active LDAP connection.
+        attr_definition (str): The olcAttributeTypes definition.
+
+    Returns:
+        bool: True if an attribute type with the same OID exists, False otherwise,
+        including when the definition has no numeric OID to compare.
+    """
+
+    oid = extract_oid(attr_definition)
+    return oid is not None and oid in get_schema_oids(conn)[0]
+
+def object_class_exists(conn, oc_definition):
+    """
+    Check whether an object class definition is already in the server schema.
+
+    Args:
+        conn (ldap3.Connection): An active LDAP connection.
+        oc_definition (str): The olcObjectClasses definition.
+
+    Returns:
+        bool: True if an object class with the same OID exists, False otherwise,
+        including when the definition has no numeric OID to compare.
+    """
+
+    oid = extract_oid(oc_definition)
+    return oid is not None and oid in get_schema_oids(conn)[1]
+
+# Existence checks for the schema attributes whose definitions may already be loaded
+SCHEMA_EXISTS_CHECKS = {
+    'olcAttributeTypes': attribute_type_exists,
+    'olcObjectClasses': object_class_exists,
+}
+
+def process_modify(conn, dn, modifications):
+    """
+    Send an LDIF modify record.
+
+    The modifications are grouped by attribute, keeping their order within
+    each attribute; modifications of different attributes do not affect each
+    other, so the result is the same as applying them in the record's order.
+    Schema definitions added to cn=schema,cn=config that the server already
+    has are skipped, so schema LDIFs can be applied more than once.
+
+    Args:
+        conn (ldap3.Connection): An active asynchronous LDAP connection.
+        dn (str): The DN of the entry to modify.
+        modifications (list): The (operation, attribute, values) tuples of the record, in order.
+
+    Returns:
+        int or None: The message ID of the modify request, or None if every
+        change was already present on the server.
+    """
+
+    is_schema = dn.lower() == SCHEMA_DN
+    changes = {}
+    for op, attr, values in modifications:
+        exists = SCHEMA_EXISTS_CHECKS.get(attr) if is_schema and op == 'add' else None
+        if exists:
+            values = [value for value in values if not exists(conn, value)]
+            if not values:
+                print(f"All {attr} definitions already exist in {dn}, skipping.")
+                continue
+        changes.setdefault(attr, []).append((LDAP_OP_MAP[op], values))
+
+    if not changes:
+        return None
+
+    # Record the new definitions right away so records sent later in the
+    # pipeline see them; a failed modify fails the whole file anyway.
+    if is_schema:
+        attr_oids, oc_oids = get_schema_oids(conn)
+        for ldap_op, values in changes.get('olcAttributeTypes', []):
+            if ldap_op == MODIFY_ADD:
+                attr_oids.update(extract_oid(value) for value in values)
+        for ldap_op, values in changes.get('olcObjectClasses', []):
+            if ldap_op == MODIFY_ADD:
+                oc_oids.update(extract_oid(value) for value in values)
+        attr_oids.discard(None)
+        oc_oids.discard(None)
+    return conn.modify(dn, changes)
+
+def process_delete(conn, dn, entry):
+    """
+    Send an LDIF delete record.
+
+    Args:
+        conn (ldap3.Connection): An active asynchronous LDAP connection.
+        dn (str): The DN of the entry to delete.
+        entry (None): The body of the delete record, which has none.
+
+    Returns:
+        int: The message ID of the delete request.
+    """
+
+    return conn.delete(dn)
+
+# Dispatch table from LDIF changetype to the function applying it
+CHANGETYPE_HANDLERS = {
+    'add': process_add,
+    'modify': process_modify,
+    'delete': process_delete,
+}
+
+def drain_responses(conn, pending):
+    """
+    Wait for the responses to every pipelined operation and report failures.
+
+    Args:
+        conn (ldap3.Connection): An active asynchronous LDAP connection.
+        pending (list): (message ID, DN, changetype) tuples of the operations
+            in flight; the list is emptied.
+
+    Returns:
+        bool: True if every operation succeeded, False otherwise.
+    """
+
+    applied = True
+    for msg_id, dn, changetype in pending:
+        response, result = conn.get_response(msg_id)
+        if result['result'] != 0:
+            print(f"Failed to {changetype} {dn}: {result['description']}")
+            applied = False
+    pending.clear()
+    return applied
+
+def depends_on_pending(dn, pending):
+    """
+    Check whether a DN is, or is an ancestor or descendant of, a DN in flight.
+
+    Operations on one connection may be processed concurrently by the
+    server, so a record touching a related entry must wait for the ones
+    already sent.
+
+    Args:
+        dn (str): The DN of the record about to be sent.
+        pending (list): (message ID, DN, changetype) tuples of the operations in flight.
+
+    Returns:
+        bool: True if the record depends on a pending operation, False otherwise.
+    """
+
+    dn = dn.lower()
+    for msg_id, pending_dn, changetype in pending:
+        pending_dn = pending_dn.lower()
+        if dn == pending_dn or dn.endswith(',' + pending_dn) or pending_dn.endswith(',' + dn):
+            return True
+    return False
+
+def is_pipelined(dn, changetype):
+    """
+    Check whether a record may be sent while other operations are in flight.
+
+    Only adds of entries outside cn=config are pipelined. A modify or delete
+    may depend on any record before it, and a cn=config change, such as a
+    module, an overlay or a schema definition, can change how the server
+    handles the records after it.
+
+    Args:
+        dn (str): The DN of the record.
+        changetype (str): The changetype of the record.
+
+    Returns:
+        bool: True if the record may be pipelined, False if it must be sent alone.
+    """
+
+    dn = dn.lower()
+    return changetype == 'add' and dn != CONFIG_DN and not dn.endswith(',' + CONFIG_DN)
 
-    Raises:
-        CalledProcessError: If the ldapmodify command fails.
+def process_ldif_file(conn, ldif_file):
     """
+    Parse an LDIF stream and apply each record over an existing connection.
+
+    Records without a changetype are treated as entries to add. Adds outside
+    cn=config are pipelined: up to PIPELINE_DEPTH of them are sent before
+    their responses are collected, and the pipeline is drained before any
+    add of an entry related to one still in flight. Every other record is
+    sent alone, once the operations before it have completed, and its
+    response is collected before the next record is sent. Processing stops
+    at the first failed batch, and every response is collected before
+    returning.
+
+    Args:
+        conn (ldap3.Connection): An active asynchronous LDAP connection.
+        ldif_file (file): The LDIF file, opened in binary mode.
 
-    ldapmodify_cmd = [
-        "ldapmodify",
-        "-H", ldap_server_url,
-        "-D", config_dn,
-        "-w", config_password,
-        "-f", ldif_file
-    ]
+    Returns:
+        bool: True if every record was applied, False otherwise.
+    """
+
+    pending = []
+    try:
+        for dn, changetype, body in parse_records(ldif_file):
+            handler = CHANGETYPE_HANDLERS.get(changetype)
+            if handler is None:
+                print(f"Unsupported changetype '{changetype}' for {dn}")
+                return False
+            pipelined = is_pipelined(dn, changetype)
+            if not pipelined or len(pending) >= PIPELINE_DEPTH or depends_on_pending(dn, pending):
+                if not drain_responses(conn, pending):
+                    return False
+            msg_id = handler(conn, dn, body)
+            if msg_id is not None:
+                pending.append((msg_id, dn, changetype))
+                if not pipelined and not drain_responses(conn, pending):
+                    return False
+    finally:
+        applied = drain_responses(conn, pending)
+    return applied
+
+def apply_ldif_file(conn, ldif_file):
+    """
+    Apply a single LDIF file over an existing LDAP connection.
+
+    Args:
+        conn (ldap3.Connection): An active LDAP connection.
+        ldif_file (str): The path to the LDIF file to be applied.
+
+    Returns:
+        bool: True if the LDIF file was applied successfully, False otherwise.
+    """
 
     try:
         print(f"Applying LDIF: {ldif_file}...")
-        subprocess.run(ldapmodify_cmd, check=True)
-        print(f"LDIF {ldif_file} applied successfully.")
-    except subprocess.CalledProcessError as e:
+        with open(ldif_file, "rb") as file:
+            applied = process_ldif_file(conn, file)
+    except (LDAPException, ValueError, OSError) as e:
         print(f"Error applying {ldif_file}: {e}")
+        return False
+
+    if applied:
+        print(f"LDIF {ldif_file} applied successfully.")
+    else:
+        print(f"Error applying {ldif_file}.")
+    return applied
+
+def iter_ldifs_bottom_up(ldif_root):
+    """
+    Yield every LDIF file under a directory tree in bottom-up order.
 
-def apply_ldif_directory_bottom_up(ldif_root):
+    The tree is walked with `os.scandir`, whose entries carry the file type
+    from the directory listing, so no extra `stat()` is needed per entry.
+    The LDIF files of a directory are yielded after those of all its
+    subdirectories.
+
+    Args:
+        ldif_root (str): The root directory containing LDIF files.
+
+    Yields:
+        tuple: The depth of the file's directory below the root and the file path.
+    """
+
+    # Each frame is a directory still to scan, or the scanned LDIF files of
+    # a directory, emitted once its subdirectories have been popped.
+    stack = [(0, ldif_root, None)]
+    while stack:
+        depth, path, ldif_files = stack.pop()
+        if ldif_files is not None:
+            for ldif_path in ldif_files:
+                yield depth, ldif_path
+            continue
+
+        subdirs = []
+        ldif_files = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.is_file() and entry.name.endswith(".ldif"):
+                    ldif_files.append(entry.path)
+
+        stack.append((depth, path, sorted(ldif_files)))
+        stack.extend((depth + 1, subdir, None) for subdir in sorted(subdirs, reverse=True))
+
+def collect_ldifs_by_depth(ldif_root):
+    """
+    Collect the LDIF files under a directory tree grouped by directory depth.
+
+    Args:
+        ldif_root (str): The root directory containing LDIF files.
+
+    Returns:
+        list: Lists of LDIF paths, one per depth level, deepest level first.
+    """
+
+    levels = {}
+    for depth, ldif_path in iter_ldifs_bottom_up(ldif_root):
+        levels.setdefault(depth, []).append(ldif_path)
+
+    return [levels[depth] for depth in sorted(levels, reverse=True)]
+
+def hash_ldif_file(ldif_file):
+    """
+    Compute the content hash recorded in the manifest for an LDIF file.
+
+    Args:
+        ldif_file (str): The path to the LDIF file.
+
+    Returns:
+        str: The hex digest of the file contents.
+    """
+
+    with open(ldif_file, "rb") as file:
+        return hashlib.blake2b(file.read(), digest_size=16).hexdigest()
+
+def load_manifest(manifest_path):
+    """
+    Load the manifest of applied LDIF files, if it exists.
+
+    Args:
+        manifest_path (str): Path to the manifest file.
+
+    Returns:
+        dict: For each target, as returned by manifest_target, the LDIF paths
+        relative to the LDIF root mapped to the hash of the contents last
+        applied; empty if there is no manifest.
+    """
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as file:
+            manifest = json.load(file)
+        # Drop the entries of manifests written before they were kept per target
+        return {target: applied for target, applied in manifest.items() if isinstance(applied, dict)}
+    return {}
+
+def manifest_target(ldap_server_url, bind_dn):
+    """
+    Return the key under which the LDIF files applied to a server are recorded.
+
+    Args:
+        ldap_server_url (str): The URL, or comma-separated URLs, of the LDAP server.
+        bind_dn (str): The DN the files are applied as.
+
+    Returns:
+        str: The bind DN and server URL, e.g. "cn=admin,cn=config@ldap://localhost".
+    """
+
+    return f"{bind_dn}@{ldap_server_url}"
+
+def save_manifest(manifest_path, manifest):
+    """
+    Atomically rewrite the manifest of applied LDIF files.
+
+    Args:
+        manifest_path (str): Path to the manifest file.
+        manifest (dict): For each target, LDIF paths mapped to the hash of the contents applied.
+    """
+
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def apply_ldif_directory_bottom_up(ldif_root, parallel=8, force=False, ldap_server=None, config=None):
     """
     Traverse a directory tree in bottom-up order and apply all LDIF files.
 
-    This function loads the LDAP configuration from the helx_ldap_config.yaml file and 
+    This function uses the LDAP configuration from the helx_ldap_config.yaml file and
     applies all `.ldif` files in the given directory, processing subdirectories first.
+    Files at the same depth are applied concurrently by a pool of worker threads,
+    each reusing its own bound connection; every level is finished before the
+    next shallower one starts.
+
+    The hash of every file applied successfully is recorded in a manifest in
+    the root directory, separately for each server and bind DN, and files
+    whose contents have not changed since they were applied to the same
+    server are skipped unless `force` is set. If no connection to the server can be
+    opened, the run stops after the level where that happened.
 
     Args:
         ldif_root (str): The root directory containing LDIF files to be applied.
+        parallel (int): The maximum number of LDIF files applied concurrently.
+        force (bool): Apply every LDIF file, even those recorded as applied.
+        ldap_server (str): Comma-separated LDAP server URLs overriding the configured server URL.
+        config (dict): The already loaded configuration; it is loaded from helx_ldap_config.yaml if not given.
     """
 
     # Load LDAP configuration
-    config = load_ldap_config()
+    if config is None:
+        config = load_ldap_config()
+    if config is None:
+        print("Error: helx_ldap_config.yaml not found.")
+        return
 
     # Extract relevant fields from the configuration file
-    ldap_server_url = config['ldap']['server_url']
+    ldap_server_url = ldap_server or config['ldap']['server_url']
     config_dn = config['ldap']['config']['dn']
     config_password = config['ldap']['config']['password']
 
-    # Traverse the directory tree in bottom-up order
-    for root, dirs, files in os.walk(ldif_root, topdown=False):
-        for file in files:
-            if file.endswith(".ldif"):
-                ldif_path = os.path.join(root, file)
-                apply_ldif_file(ldif_path, ldap_server_url, config_dn, config_password)
+    manifest_path = os.path.join(ldif_root, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    applied_files = manifest.setdefault(manifest_target(ldap_server_url, config_dn), {})
+
+    connections = ThreadConnections(lambda: connect_ldap_server(ldap_server_url, config_dn, config_password))
+
+    def apply_worker(ldif_path):
+        try:
+            return apply_ldif_file(connections.get(), ldif_path)
+        except LDAPException as e:
+            print(f"LDAP error: {e}")
+            return False
+
+    try:
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            # Apply one depth level at a time, deepest first
+            for level in collect_ldifs_by_depth(ldif_root):
+                pending = []
+                for ldif_path in level:
+                    key = os.path.relpath(ldif_path, ldif_root)
+                    digest = hash_ldif_file(ldif_path)
+                    if not force and applied_files.get(key) == digest:
+                        print(f"LDIF {ldif_path} unchanged since it was applied, skipping.")
+                        continue
+                    pending.append((ldif_path, key, digest))
+
+                results = executor.map(apply_worker, [ldif_path for ldif_path, key, digest in pending])
+                updated = False
+                for (ldif_path, key, digest), applied in zip(pending, results):
+                    if applied:
+                        applied_files[key] = digest
+                        updated = True
+                if updated:
+                    save_manifest(manifest_path, manifest)
+                if connections.error is not None:
+                    print("Cannot connect to the LDAP server, not applying the remaining LDIF files.")
+                    return
+    finally:
+        connections.unbind_all()
+
+def add_arguments(parser):
+    """
+    Add the command-line arguments for applying LDIF files to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser of this script, or of a helx_ldap_cli subcommand.
+    """
 
-if __name__ == "__main__":
-    # Argument parser setup
-    parser = argparse.ArgumentParser(description="Apply LDIF files from a directory in bottom-up order.")
     parser.add_argument("directory", help="The root directory containing LDIF files to apply.")
+    parser.add_argument("--parallel", type=int, default=8, help="Maximum number of LDIF files applied concurrently (default: 8)")
+    parser.add_argument("--force", action="store_true", help="Apply every LDIF file, including those already applied and unchanged")
+    parser.add_argument("--ldap-server", help="LDAP server URL, or a comma-separated list of URLs to use as a server pool")
 
-    # Parse arguments
-    args = parser.parse_args()
+def run(args, config):
+    """
+    Apply all LDIF files in the directory given by the arguments, bottom-up.
+
+    Args:
+        args (argparse.Namespace): The arguments added by add_arguments, parsed.
+        config (dict or None): The helx_ldap_config.yaml configuration, or None if there is none.
+    """
+
+    apply_ldif_directory_bottom_up(args.directory, args.parallel, args.force, args.ldap_server, config)
+
+if __name__ == "__main__":
+    # Argument parser setup
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    add_arguments(parser)
 
     # Apply all LDIF files in the specified directory (bottom-up)
-    apply_ldif_directory_bottom_up(args.directory)
+    run(parser.parse_args(), load_ldap_config())
@@ -6,10 +6,10 @@ def uuid_to_oid():
     """
     Generate a new UUID and convert it to an OID.
 
-    This function generates a random UUID (Universally Unique Identifier) using 
-    the `uuid4` function from the Python `uuid` module. The UUID is then 
-    converted to an OID (Object Identifier) by appending the UUID's integer 
-    representation to the OID prefix '2.25'.
+    This function generates a random UUID (Universally Unique Identifier) using
+    the `uuid4` function from the Python `uuid` module. The UUID is then
+    converted to an OID (Object Identifier) by appending the integer value of
+    the UUID's 16 bytes to the OID prefix '2.25'.
 
     Returns:
         tuple: A tuple containing:
@@ -19,11 +19,26 @@ def uuid_to_oid():
 
     # Generate a new UUID
     uid = uuid.uuid4()
-    # Convert UUID to an integer and then to a dotted decimal OID string under 2.25
-    oid = '2.25.' + str(uid.int)
+    # Convert the UUID bytes to an integer and then to a dotted decimal OID string under 2.25
+    oid = f"2.25.{int.from_bytes(uid.bytes, 'big')}"
     return oid, uid
 
-# Generate OID and UUID
-oid, new_uuid = uuid_to_oid()
-print("Generated UUID:", new_uuid)
-print("Corresponding OID:", oid)
+def iter_oids(count):
+    """
+    Generate several OIDs, e.g. for the definitions of a new schema LDIF.
+
+    Args:
+        count (int): The number of OIDs to generate.
+
+    Yields:
+        tuple: The OID and the UUID it was derived from, as returned by uuid_to_oid.
+    """
+
+    for _ in range(count):
+        yield uuid_to_oid()
+
+if __name__ == "__main__":
+    # Generate OID and UUID
+    oid, new_uuid = uuid_to_oid()
+    print("Generated UUID:", new_uuid)
+    print("Corresponding OID:", oid)
@@ -1,84 +1,110 @@
 #!/usr/bin/env python
 
-from ldap3 import Server, Connection, ALL
+from ldap3 import Connection, ASYNC
 import argparse
-from urllib.parse import urlparse
 import os
-import yaml
+from helx_ldap.config import load_ldap_config
+from helx_ldap.server import make_server
 
-def load_ldap_config(config_file="helx_ldap_config.yaml"):
+# Shown by --help, here and for the helx_ldap_cli subcommand
+DESCRIPTION = 'Delete a single LDAP entry specified by DN, or the entries listed in a file.'
+
+# Maximum number of delete requests sent before waiting for their responses
+PIPELINE_DEPTH = 128
+
+def drain_deletes(conn, pending):
     """
-    Load LDAP configuration from a YAML file, if it exists.
-    
+    Wait for the responses to the pipelined delete requests and report them.
+
     Args:
-        config_file (str): Path to the configuration file (default: helx_ldap_config.yaml)
-    
-    Returns:
-        dict or None: Loaded configuration as a dictionary, or None if the file doesn't exist.
+        conn (ldap3.Connection): An active asynchronous LDAP connection.
+        pending (list): (message ID, DN) tuples of the deletes in flight; the list is emptied.
     """
 
-    if os.path.exists(config_file):
-        with open(config_file, "r") as file:
-            config = yaml.safe_load(file)
-        return config
-    else:
-        return None
+    for msg_id, dn in pending:
+        response, result = conn.get_response(msg_id)
+        if result['result'] == 0:
+            print(f"Successfully deleted DN: {dn}")
+        elif result['description'] == 'noSuchObject':
+            print(f"No such entry: {dn}")
+        else:
+            print(f"Error deleting DN {dn}: {result['description']}")
+    pending.clear()
 
-def delete_ldap_user(dn, ldap_config):
+def delete_ldap_entries(dns, ldap_config):
     """
-    Delete a user from the LDAP server given the DN and configuration.
-    
+    Delete LDAP entries given their DNs and configuration, over a single connection.
+
+    The delete requests are pipelined, up to PIPELINE_DEPTH at a time. Before
+    an entry is deleted, the deletes already sent for entries below it are
+    waited for, so a subtree can be removed by listing children before parents.
+
     Args:
-        dn (str): The DN (Distinguished Name) of the LDAP entry to delete.
+        dns (iterable): The DNs (Distinguished Names) of the LDAP entries to delete.
         ldap_config (dict): A dictionary containing LDAP server details, bind DN, and password.
     """
 
     conn = None
     try:
-        # Parse the LDAP server URL
-        parsed_url = urlparse(ldap_config['ldap_server'])
-        host = parsed_url.hostname
-        port = parsed_url.port
-        use_ssl = parsed_url.scheme == 'ldaps'
-
-        # Initialize the LDAP server
-        server = Server(host, port=port, use_ssl=use_ssl, get_info=ALL)
-
-        # Bind to the server
-        conn = Connection(server, user=ldap_config['bind_dn'], password=ldap_config['bind_password'], auto_bind=True)
-
-        # Attempt to delete the DN
-        if conn.delete(dn):
-            print(f"Successfully deleted DN: {dn}")
-        else:
-            if conn.result['description'] == 'noSuchObject':
-                print(f"No such entry: {dn}")
-            else:
-                print(f"Error deleting DN {dn}: {conn.result['description']}")
+        # Bind to the server; the deletes follow the bind response directly
+        conn = Connection(make_server(ldap_config['ldap_server']), user=ldap_config['bind_dn'], password=ldap_config['bind_password'],
+                          client_strategy=ASYNC, auto_bind=False)
+        if not conn.bind():
+            print(f"LDAP bind failed: {conn.last_error}")
+            return
+
+        # Send the deletes, waiting for their responses in batches
+        pending = []
+        for dn in dns:
+            suffix = ',' + dn.lower()
+            if len(pending) >= PIPELINE_DEPTH or any(p_dn.lower().endswith(suffix) for _, p_dn in pending):
+                drain_deletes(conn, pending)
+            pending.append((conn.delete(dn), dn))
+        drain_deletes(conn, pending)
     except Exception as e:
         print(f"LDAP error: {e}")
     finally:
         if conn:
             conn.unbind()
 
-def main():
+def delete_ldap_user(dn, ldap_config):
     """
-    Main function to parse command-line arguments, load configuration, and delete the LDAP entry.
+    Delete a user from the LDAP server given the DN and configuration.
     
-    This function accepts command-line arguments for the DN, LDAP server URL, bind DN, and bind password.
-    If any of these values are missing from the arguments, the script attempts to load them from the helx_ldap_config.yaml file.
+    Args:
+        dn (str): The DN (Distinguished Name) of the LDAP entry to delete.
+        ldap_config (dict): A dictionary containing LDAP server details, bind DN, and password.
     """
 
-    parser = argparse.ArgumentParser(description='Delete a single LDAP entry specified by DN.')
-    parser.add_argument('dn', help='The DN of the LDAP entry to delete')
+    delete_ldap_entries([dn], ldap_config)
+
+def add_arguments(parser):
+    """
+    Add the command-line arguments for deleting LDAP entries to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser of this script, or of a helx_ldap_cli subcommand.
+    """
+
+    # Exactly one of the DN and the file listing DNs is required
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('dn', nargs='?', help='The DN of the LDAP entry to delete')
+    target.add_argument('--from-file', help='Path to a file with the DNs of the LDAP entries to delete, one per line')
     parser.add_argument('--ldap-server', help='LDAP server URL, e.g., ldap://localhost')
     parser.add_argument('--bind-dn', default='cn=admin,dc=example,dc=org', help='Bind DN for LDAP authentication')
-    parser.add_argument('--bind-password', help='Password for Bind DN')
+    parser.add_argument('--bind-password', default=os.environ.get('HELX_LDAP_BIND_PASSWORD'),
+                        help='Password for Bind DN (default: $HELX_LDAP_BIND_PASSWORD)')
+
+def run(args, config):
+    """
+    Delete the LDAP entry, or the entries listed in a file, given by the arguments.
 
-    args = parser.parse_args()
+    Connection details missing from the arguments are taken from the configuration.
 
-    # Load the configuration from the YAML file, if it exists
-    config = load_ldap_config()
+    Args:
+        args (argparse.Namespace): The arguments added by add_arguments, parsed.
+        config (dict or None): The helx_ldap_config.yaml configuration, or None if there is none.
+    """
 
     # Use values from the config file if available and not overridden by arguments
     ldap_config = {
@@ -95,8 +121,25 @@ def main():
         print("Error: LDAP bind password is required.")
         return
 
-    # Delete the LDAP user
-    delete_ldap_user(args.dn, ldap_config)
+    # Delete the LDAP entries listed in the file, or the single LDAP user
+    if args.from_file:
+        with open(args.from_file, 'r') as file:
+            delete_ldap_entries((line.strip() for line in file if line.strip()), ldap_config)
+    else:
+        delete_ldap_user(args.dn, ldap_config)
+
+def main():
+    """
+    Main function to parse command-line arguments, load configuration, and delete the LDAP entries.
+    
+    This function accepts command-line arguments for the DN (or a file listing one DN per line),
+    LDAP server URL, bind DN, and bind password.
+    If any of these values are missing from the arguments, the script attempts to load them from the helx_ldap_config.yaml file.
+    """
+
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    add_arguments(parser)
+    run(parser.parse_args(), load_ldap_config())
 
 if __name__ == "__main__":
     main()
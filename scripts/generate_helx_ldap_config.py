@@ -1,14 +1,15 @@
 #!/usr/bin/env python
 
 import yaml
-import random
+import secrets
 import string
 from getpass import getpass
+from helx_ldap.yaml_io import SafeDumper
 
 def generate_random_password(length=10):
     """Generates a random password of given length without punctuation."""
     characters = string.ascii_letters + string.digits  # No punctuation
-    return ''.join(random.choice(characters) for i in range(length))
+    return ''.join(secrets.choice(characters) for i in range(length))
 
 def prompt_with_default(prompt_text, default_value):
     """
@@ -66,7 +67,7 @@ def generate_ldap_config():
 
     # Write to helx_ldap_config.yaml
     with open("helx_ldap_config.yaml", "w") as yaml_file:
-        yaml.dump(ldap_config, yaml_file, default_flow_style=False)
+        yaml.dump(ldap_config, yaml_file, Dumper=SafeDumper, default_flow_style=False)
 
     print("\nHElX LDAP configuration has been saved to 'helx_ldap_config.yaml'.")
 
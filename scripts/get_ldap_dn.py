@@ -9,93 +9,90 @@ fetches all DNs under a specified search base. The search base can be provided
 as a command-line argument with a default fallback.
 """
 
-from ldap3 import Server, Connection, ALL, SUBTREE
+from ldap3 import Connection, SUBTREE
 import argparse
-from urllib.parse import urlparse
 import os
-import yaml
+import sys
+from helx_ldap.config import load_ldap_config
+from helx_ldap.search import PAGE_SIZE
+from helx_ldap.server import make_server
 
-def load_ldap_config(config_file="helx_ldap_config.yaml"):
-    """
-    Load LDAP configuration from a YAML file, if it exists.
-
-    Args:
-        config_file (str): Path to the configuration file (default: helx_ldap_config.yaml)
+# Shown by --help, here and for the helx_ldap_cli subcommand
+DESCRIPTION = 'Retrieve all Distinguished Names (DNs) from an LDAP server.'
 
-    Returns:
-        dict or None: The loaded configuration as a dictionary, or None if the file doesn't exist.
-    """
-
-    if os.path.exists(config_file):
-        with open(config_file, "r") as file:
-            config = yaml.safe_load(file)
-        return config
-    else:
-        return None
+# Number of DNs written to stdout at a time
+OUTPUT_BATCH_SIZE = 4096
 
 def fetch_all_dns(ldap_server_url, bind_dn, bind_password, search_base):
     """
     Connect to an LDAP server and retrieve all Distinguished Names (DNs) from the specified search base.
 
+    The search is paged, so DNs are yielded as each page arrives and memory
+    use does not grow with the size of the subtree. The connection is closed
+    once the generator is exhausted or closed.
+
     Args:
         ldap_server_url (str): The URL of the LDAP server (e.g., ldap://localhost).
         bind_dn (str): The Distinguished Name (DN) to bind to the LDAP server.
         bind_password (str): The password for the bind DN.
         search_base (str): The base DN where the search begins.
 
-    Returns:
-        list: A list of DNs retrieved from the server, or an empty list in case of an error.
+    Yields:
+        str: Each DN retrieved from the server. An error is reported and ends the iteration.
     """
 
     conn = None
     try:
-        # Parse the LDAP server URL and extract the host, port, and SSL setting
-        parsed_url = urlparse(ldap_server_url)
-        host = parsed_url.hostname
-        port = parsed_url.port
-        use_ssl = parsed_url.scheme == 'ldaps'
-
-        # Initialize the LDAP server and establish the connection
-        server = Server(host, port=port, use_ssl=use_ssl, get_info=ALL)
-        conn = Connection(server, user=bind_dn, password=bind_password, auto_bind=True)
+        # Establish the connection to the LDAP server
+        conn = Connection(make_server(ldap_server_url), user=bind_dn, password=bind_password, auto_bind=True)
         
         # Define the search filter to match all entries (objectClass=*)
         search_filter = '(objectClass=*)'
 
-        # Perform the search operation
-        conn.search(search_base, search_filter, search_scope=SUBTREE, attributes=[])
-
-        # Extract and return the DNs from the result set
-        result_set = [entry.entry_dn for entry in conn.entries]
-        return result_set
+        # Perform the search operation one page at a time
+        entries = conn.extend.standard.paged_search(
+            search_base,
+            search_filter,
+            search_scope=SUBTREE,
+            attributes=[],
+            paged_size=PAGE_SIZE,
+            generator=True
+        )
+
+        # Yield the DNs from the result set, skipping any referrals
+        for entry in entries:
+            if entry['type'] == 'searchResEntry':
+                yield entry['dn']
     except Exception as e:
         print("LDAP error:", e)
-        return []
     finally:
         if conn:
             conn.unbind()
 
-def main():
+def add_arguments(parser):
     """
-    Main function to parse arguments, load configuration, and retrieve DNs.
+    Add the command-line arguments for retrieving DNs to a parser.
 
-    The function accepts command-line arguments for the LDAP server URL, bind DN, 
-    bind password, and search base. It also optionally loads configurations from 
-    the helx_ldap_config.yaml file if present.
+    Args:
+        parser (argparse.ArgumentParser): The parser of this script, or of a helx_ldap_cli subcommand.
     """
 
-    parser = argparse.ArgumentParser(description='Retrieve all Distinguished Names (DNs) from an LDAP server.')
-    
-    # Command-line arguments
     parser.add_argument('--ldap-server', help='LDAP server URL, e.g., ldap://localhost')
     parser.add_argument('--bind-dn', help='Bind DN for LDAP authentication')
-    parser.add_argument('--bind-password', help='Password for Bind DN')
+    parser.add_argument('--bind-password', default=os.environ.get('HELX_LDAP_BIND_PASSWORD'),
+                        help='Password for Bind DN (default: $HELX_LDAP_BIND_PASSWORD)')
     parser.add_argument('--search-base', default='dc=example,dc=org', help='Base DN where the search starts (default: dc=example,dc=org)')
 
-    args = parser.parse_args()
+def run(args, config):
+    """
+    Retrieve all DNs under the search base and print them, one per line.
 
-    # Load configuration from the helx_ldap_config.yaml file if available
-    config = load_ldap_config()
+    Connection details missing from the arguments are taken from the configuration.
+
+    Args:
+        args (argparse.Namespace): The arguments added by add_arguments, parsed.
+        config (dict or None): The helx_ldap_config.yaml configuration, or None if there is none.
+    """
 
     # Use either command-line arguments or configuration file for connection details
     ldap_server_url = args.ldap_server or (config['ldap'].get('server_url') if config and 'ldap' in config else None)
@@ -110,10 +107,31 @@ def main():
         print("Error: LDAP bind password is required.")
         return
 
-    # Fetch and print all DNs from the LDAP server
-    dns = fetch_all_dns(ldap_server_url, bind_dn, bind_password, args.search_base)
-    for dn in dns:
-        print(dn)
+    # Fetch all DNs from the LDAP server and print them in batches
+    batch = []
+    for dn in fetch_all_dns(ldap_server_url, bind_dn, bind_password, args.search_base):
+        batch.append(dn)
+        if len(batch) >= OUTPUT_BATCH_SIZE:
+            sys.stdout.write('\n'.join(batch) + '\n')
+            batch.clear()
+    if batch:
+        sys.stdout.write('\n'.join(batch) + '\n')
+    sys.stdout.flush()
+
+def main():
+    """
+    Main function to parse arguments, load configuration, and retrieve DNs.
+
+    The function accepts command-line arguments for the LDAP server URL, bind DN, 
+    bind password, and search base. It also optionally loads configurations from 
+    the helx_ldap_config.yaml file if present.
+    """
+
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    add_arguments(parser)
+    # Block-buffer stdout even on a terminal, so DNs are not written one line per syscall
+    sys.stdout.reconfigure(line_buffering=False)
+    run(parser.parse_args(), load_ldap_config())
 
 if __name__ == "__main__":
     main()
@@ -1,35 +1,44 @@
 #!/usr/bin/env python
 
 import traceback
-from ldap3 import Server, Connection, ALL, SUBTREE
+from collections import defaultdict
+from ldap3 import Connection, BASE, SUBTREE
 import argparse
-import yaml
-from urllib.parse import urlparse
 import os
-
-def load_ldap_config(config_file="helx_ldap_config.yaml"):
-    """
-    Load LDAP configuration from a YAML file, if it exists.
-
-    Args:
-        config_file (str): Path to the YAML configuration file (default: helx_ldap_config.yaml).
-
-    Returns:
-        dict or None: Returns a dictionary of LDAP configuration if the file exists, 
-        otherwise returns None.
-    """
-    if os.path.exists(config_file):
-        with open(config_file, "r") as file:
-            return yaml.safe_load(file)
-    return None
+import yaml
+from helx_ldap.config import load_ldap_config
+from helx_ldap.search import PAGE_SIZE, as_list
+from helx_ldap.server import make_server
+from helx_ldap.yaml_io import SafeDumper
+
+# Shown by --help, here and for the helx_ldap_cli subcommand
+DESCRIPTION = 'Retrieve and display details for all users in the LDAP directory.'
+
+# Attributes returned for each user
+USER_ATTRIBUTES = [
+    'uid', 'cn', 'sn', 'mail', 'telephoneNumber',
+    'givenName', 'displayName', 'o', 'ou',
+    'runAsUser', 'runAsGroup', 'fsGroup', 'supplementalGroups'
+]
+
+# Conversion of each attribute's (non-empty) values to the reported value
+_INT_ATTRS = frozenset({'runAsUser', 'runAsGroup', 'fsGroup'})
+_INT_LIST_ATTRS = frozenset({'supplementalGroups'})
+_HANDLERS = {
+    attr: (lambda values: int(values[0])) if attr in _INT_ATTRS else
+          (lambda values: [int(x) for x in values]) if attr in _INT_LIST_ATTRS else
+          (lambda values: values[0])
+    for attr in USER_ATTRIBUTES
+}
 
 def fetch_user_details(ldap_server_url, bind_dn, bind_password, search_base, group_base):
     """
-    Fetches user details from the LDAP server and processes their attributes.
+    Fetches user details from the LDAP server and yields them one at a time.
 
     The function binds to an LDAP server and retrieves user entries based on 
-    the specified search base and filter. It also checks group memberships for 
-    each user and processes attributes like `cn`, `mail`, `telephoneNumber`, etc.
+    the specified search base and filter. Group memberships are read with a 
+    single search of the group base and matched to each user, and attributes 
+    like `cn`, `mail`, `telephoneNumber`, etc. are processed.
 
     Args:
         ldap_server_url (str): The URL of the LDAP server (e.g., ldap://localhost).
@@ -38,109 +47,94 @@ def fetch_user_details(ldap_server_url, bind_dn, bind_password, search_base, gro
         search_base (str): The base DN for searching user entries.
         group_base (str): The base DN for searching group memberships.
 
-    Returns:
-        list: A list of dictionaries, each containing user details and their group memberships.
+    Yields:
+        dict: The details of one user, including their group memberships.
     """
     conn = None
     try:
-        parsed_url = urlparse(ldap_server_url)
-        host = parsed_url.hostname
-        port = parsed_url.port
-        use_ssl = parsed_url.scheme == 'ldaps'
-
-        # Initialize and bind to the LDAP server
-        server = Server(host, port=port, use_ssl=use_ssl, get_info=ALL)
-        conn = Connection(server, user=bind_dn, password=bind_password, auto_bind=True)
+        # Bind to the LDAP server
+        conn = Connection(make_server(ldap_server_url), user=bind_dn, password=bind_password, auto_bind=True)
 
         # Search for user entries
         search_filter = '(objectClass=inetOrgPerson)'
-        retrieve_attributes = [
-            'uid', 'cn', 'sn', 'mail', 'telephoneNumber',
-            'givenName', 'displayName', 'o', 'ou',
-            'runAsUser', 'runAsGroup', 'fsGroup', 'supplementalGroups'
-        ]
-
-        # Check if the search base exists
-        base_check = conn.search(search_base, '(objectClass=*)', search_scope=SUBTREE, attributes=[])
+
+        # Check if the search base exists, reading only the base entry and none of its attributes
+        base_check = conn.search(search_base, '(objectClass=*)', search_scope=BASE, attributes=['1.1'])
         if not base_check:
             print(f"Search base '{search_base}' does not exist.")
-            return []
-
-        # Search for users and process the results
-        conn.search(search_base, search_filter, search_scope=SUBTREE, attributes=retrieve_attributes)
-
-        # Return an empty list if no users are found
-        if len(conn.entries) == 0:
+            return
+
+        # Fetch all groups once and index their names by member DN
+        membership = defaultdict(list)
+        conn.search(group_base, '(objectClass=groupOfNames)', search_scope=SUBTREE, attributes=['cn', 'member'])
+        for group in conn.entries:
+            for member in group.member.values:
+                membership[member.lower()].append(group.cn.value)
+
+        # Search for users one page at a time and process each entry as it arrives
+        entries = conn.extend.standard.paged_search(
+            search_base,
+            search_filter,
+            search_scope=SUBTREE,
+            attributes=USER_ATTRIBUTES,
+            paged_size=PAGE_SIZE,
+            generator=True
+        )
+
+        found = False
+        for entry in entries:
+            if entry['type'] != 'searchResEntry':
+                continue
+            found = True
+            attributes = entry['attributes']
+
+            # Process each attribute, reporting missing attributes as empty strings
+            processed_entry = {
+                attr: _HANDLERS[attr](as_list(attributes[attr])) if attributes.get(attr) else ""
+                for attr in USER_ATTRIBUTES
+            }
+
+            # Look up group memberships for the user
+            processed_entry['groups'] = membership.get(entry['dn'].lower(), [])
+
+            yield processed_entry
+
+        # Report if no users are found
+        if not found:
             print(f"No users found in search base: {search_base}")
-            return []
-
-        result_set = []
-        for entry in conn.entries:
-            entry_dict = entry.entry_attributes_as_dict
-            processed_entry = {}
-
-            # Process each attribute and handle missing attributes
-            for attr in retrieve_attributes:
-                if attr in entry_dict and entry_dict[attr]:
-                    if attr in ['runAsUser', 'runAsGroup', 'fsGroup']:
-                        processed_entry[attr] = int(entry_dict[attr][0])
-                    elif attr == 'supplementalGroups':
-                        processed_entry[attr] = [int(x) for x in entry_dict[attr]]
-                    else:
-                        processed_entry[attr] = entry_dict[attr][0]
-                else:
-                    processed_entry[attr] = ""
-
-            # Fetch group memberships for the user
-            user_dn = entry.entry_dn
-            conn.search(
-                search_base=group_base,
-                search_filter=f'(&(objectClass=groupOfNames)(member={user_dn}))',
-                search_scope=SUBTREE,
-                attributes=['cn']
-            )
-
-            # Process group memberships
-            group_names = [g_entry.cn.value for g_entry in conn.entries] if conn.entries else []
-            processed_entry['groups'] = group_names
-
-            result_set.append(processed_entry)
-
-        return result_set
     except Exception as e:
         print(f"LDAP error: {e}")
         traceback.print_exc()
-        return []
     finally:
         if conn:
             conn.unbind()
 
-def main():
+def add_arguments(parser):
     """
-    Main function to retrieve and display user details from the LDAP directory.
-
-    This function parses command-line arguments for LDAP connection details,
-    binds to the LDAP server, retrieves user details, and outputs them in either
-    text or YAML format.
+    Add the command-line arguments for retrieving user details to a parser.
 
     Args:
-        None
-
-    Returns:
-        None
+        parser (argparse.ArgumentParser): The parser of this script, or of a helx_ldap_cli subcommand.
     """
-    parser = argparse.ArgumentParser(description='Retrieve and display details for all users in the LDAP directory.')
+
     parser.add_argument('--ldap-server', help='LDAP server URL, e.g., ldap://localhost')
     parser.add_argument('--bind-dn', help='Bind DN for LDAP authentication')
-    parser.add_argument('--bind-password', help='Password for Bind DN')
+    parser.add_argument('--bind-password', default=os.environ.get('HELX_LDAP_BIND_PASSWORD'),
+                        help='Password for Bind DN (default: $HELX_LDAP_BIND_PASSWORD)')
     parser.add_argument('--search-base', default='ou=users,dc=example,dc=org', help='Base DN where the search starts')
     parser.add_argument('--group-base', default='ou=groups,dc=example,dc=org', help='Base DN where the groups are located')
     parser.add_argument('--output-format', choices=['text', 'yaml'], default='text', help='Output format of the user data')
 
-    args = parser.parse_args()
+def run(args, config):
+    """
+    Retrieve the details of all users and output them in text or YAML format.
 
-    # Load configuration from the YAML file, if available
-    config = load_ldap_config()
+    Connection details missing from the arguments are taken from the configuration.
+
+    Args:
+        args (argparse.Namespace): The arguments added by add_arguments, parsed.
+        config (dict or None): The helx_ldap_config.yaml configuration, or None if there is none.
+    """
 
     # Use values from the config file if available, otherwise leave as None
     ldap_server_url = args.ldap_server or (config['ldap'].get('server_url') if config and 'ldap' in config else None)
@@ -155,7 +149,7 @@ def main():
         print("Error: LDAP bind password is required.")
         return
 
-    # Fetch user details
+    # Fetch user details lazily
     users = fetch_user_details(
         ldap_server_url,
         bind_dn,
@@ -164,9 +158,17 @@ def main():
         args.group_base
     )
 
-    # Output the user details in the requested format
+    # Output the user details in the requested format, as each user is fetched
     if args.output_format == 'yaml':
-        print(yaml.dump({'users': users}, default_flow_style=False))
+        # Each user is dumped as a one-item list, continuing the 'users' sequence
+        found = False
+        for user in users:
+            if not found:
+                print('users:')
+                found = True
+            print(yaml.dump([user], default_flow_style=False, Dumper=SafeDumper), end='')
+        if not found:
+            print('users: []')
     else:
         for user in users:
             print("User Details:")
@@ -177,5 +179,23 @@ def main():
                     print(f"{key}: {value}")
             print("-" * 40)
 
+def main():
+    """
+    Main function to retrieve and display user details from the LDAP directory.
+
+    This function parses command-line arguments for LDAP connection details,
+    binds to the LDAP server, retrieves user details, and outputs them in either
+    text or YAML format.
+
+    Args:
+        None
+
+    Returns:
+        None
+    """
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    add_arguments(parser)
+    run(parser.parse_args(), load_ldap_config())
+
 if __name__ == "__main__":
     main()
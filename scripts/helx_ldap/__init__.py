@@ -0,0 +1,6 @@
+"""
+Helpers shared by the HeLx LDAP scripts.
+
+The helpers are imported from their modules, e.g. `helx_ldap.config`, so a
+script only needing the configuration does not import ldap3.
+"""
@@ -0,0 +1,41 @@
+"""
+Loading of the helx_ldap_config.yaml configuration file shared by the scripts.
+"""
+
+import copy
+import functools
+import os
+import yaml
+from helx_ldap.yaml_io import SafeLoader
+
+@functools.lru_cache(maxsize=8)
+def _load_yaml(path, mtime_ns):
+    """
+    Parse a YAML file; cached by path and modification time, so an edited file is read again.
+    """
+
+    # Read bytes, which libyaml decodes itself
+    with open(path, "rb") as file:
+        return yaml.load(file, Loader=SafeLoader)
+
+def load_ldap_config(config_file="helx_ldap_config.yaml"):
+    """
+    Load LDAP configuration from a YAML file, if it exists.
+
+    The parsed file is cached per path and modification time, so it is read
+    only once per process unless it changes. Each call returns its own copy,
+    which the caller may modify.
+
+    Args:
+        config_file (str): Path to the YAML configuration file (default: helx_ldap_config.yaml).
+
+    Returns:
+        dict or None: The loaded configuration as a dictionary, or None if the file doesn't exist.
+    """
+
+    # A single stat both checks that the file exists and keys the cache. The file
+    # may still be removed before it is opened, which is reported the same way
+    try:
+        return copy.deepcopy(_load_yaml(config_file, os.stat(config_file).st_mtime_ns))
+    except FileNotFoundError:
+        return None
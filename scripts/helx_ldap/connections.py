@@ -0,0 +1,59 @@
+"""
+Per-thread LDAP connections for the scripts that work with a pool of threads.
+"""
+
+import threading
+
+class ThreadConnections:
+    """
+    One LDAP connection per thread, opened on first use and unbound together.
+
+    If opening a connection fails, the error is kept in `error` and raised
+    again to every thread asking for a connection later, so a server that
+    cannot be reached is tried once per run, not once per task.
+
+    Args:
+        connect (callable): Opens and binds a new connection; called with no arguments.
+    """
+
+    def __init__(self, connect):
+        self._connect = connect
+        self.error = None
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        Return the calling thread's connection, opening it on first use.
+
+        Returns:
+            ldap3.Connection: The connection, reused by every later call from the same thread.
+
+        Raises:
+            Exception: The error of the first connection that could not be opened.
+        """
+
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.error is not None:
+                raise self.error
+            try:
+                conn = self._connect()
+            except Exception as e:
+                self.error = e
+                raise
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def unbind_all(self):
+        """
+        Unbind every connection opened so far, from whichever thread opened it.
+        """
+
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.unbind()
@@ -0,0 +1,173 @@
+"""
+Parsing of LDIF files (RFC 2849), both content and change records.
+"""
+
+import base64
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+# Operations of the modifications in a modify change record
+MODIFY_OPERATIONS = ('add', 'delete', 'replace')
+
+def _decode(value):
+    """Return a value read as bytes as a string, or as bytes if it is not UTF-8 text."""
+    try:
+        return value.decode('utf-8')
+    except UnicodeDecodeError:
+        return value
+
+def _read_url(url, lineno):
+    """Return the contents of a file:// URL given as a `attr:< url` value."""
+    parsed = urlparse(url)
+    if parsed.scheme != 'file':
+        raise ValueError(f"line {lineno}: unsupported URL scheme in value: {url}")
+    with open(url2pathname(parsed.path), 'rb') as file:
+        return file.read()
+
+def parse_line(line, lineno):
+    """
+    Split an unfolded LDIF line into its attribute description and value.
+
+    Args:
+        line (bytes): The line, without its line ending.
+        lineno (int): The number of the line in the file, for error messages.
+
+    Returns:
+        tuple: The attribute description (str) and the value, a str, or bytes
+        if a base64 or URL value is not UTF-8 text.
+
+    Raises:
+        ValueError: If the line is not an `attr: value` line.
+    """
+
+    attr, sep, value = line.partition(b':')
+    if not sep or not attr:
+        raise ValueError(f"line {lineno}: expected 'attribute: value', got {line[:40]!r}")
+    attr = attr.decode('ascii')
+    if value.startswith(b':'):
+        return attr, _decode(base64.b64decode(value[1:].strip()))
+    if value.startswith(b'<'):
+        return attr, _decode(_read_url(value[1:].strip().decode('utf-8'), lineno))
+    return attr, value.lstrip(b' ').decode('utf-8')
+
+def iter_records(ldif_file):
+    """
+    Yield the records of an LDIF stream, one at a time, as lists of lines.
+
+    Folded lines are joined, and comments are dropped.
+
+    Args:
+        ldif_file (file): The LDIF file, opened in binary mode.
+
+    Yields:
+        list: The (line number, line) tuples of each record, line endings removed.
+    """
+
+    record = []
+    comment = False
+    for lineno, line in enumerate(ldif_file, 1):
+        line = line.rstrip(b'\r\n')
+        if line.startswith(b' '):
+            # A continuation of the previous line, or of a comment
+            if record and not comment:
+                record[-1] = (record[-1][0], record[-1][1] + line[1:])
+            continue
+        comment = line.startswith(b'#')
+        if comment:
+            continue
+        if line:
+            record.append((lineno, line))
+        elif record:
+            yield record
+            record = []
+    if record:
+        yield record
+
+def _parse_modifications(dn, lines):
+    """
+    Group the lines of a modify record into its modifications.
+
+    Args:
+        dn (str): The DN of the record, for error messages.
+        lines (list): The (line number, attribute, value) tuples after the
+            changetype, with None as the attribute of a `-` separator.
+
+    Returns:
+        list: The (operation, attribute, values) tuple of each modification, in order.
+
+    Raises:
+        ValueError: If the modifications are malformed.
+    """
+
+    modifications = []
+    current = None
+    for lineno, attr, value in lines:
+        if attr is None:
+            if current is None:
+                raise ValueError(f"line {lineno}: '-' without a modification for {dn}")
+            current = None
+        elif current is None:
+            if attr.lower() not in MODIFY_OPERATIONS:
+                raise ValueError(f"line {lineno}: unknown modify operation '{attr}' for {dn}")
+            current = (attr.lower(), value, [])
+            modifications.append(current)
+        elif attr.lower() != current[1].lower():
+            raise ValueError(f"line {lineno}: '{attr}' in the '{current[0]}: {current[1]}' modification of {dn}")
+        else:
+            current[2].append(value)
+    if not modifications:
+        raise ValueError(f"No modifications found for {dn}")
+    return modifications
+
+def parse_records(ldif_file):
+    """
+    Parse the records of an LDIF stream, one at a time.
+
+    Records without a changetype are content records, returned as adds. The
+    modifications of a modify record are returned in the order of their
+    `-`-separated blocks, each with its own values.
+
+    Args:
+        ldif_file (file): The LDIF file, opened in binary mode.
+
+    Yields:
+        tuple: The DN, the changetype, and the body of each record: the
+        attributes of an add, as a dict of value lists; a list of (operation,
+        attribute, values) tuples for a modify; None otherwise.
+
+    Raises:
+        ValueError: If a record is malformed.
+    """
+
+    first = True
+    for record in iter_records(ldif_file):
+        lines = [(lineno, None, None) if line == b'-' else (lineno, *parse_line(line, lineno))
+                 for lineno, line in record]
+        if first and lines[0][1] is not None and lines[0][1].lower() == 'version':
+            lines.pop(0)
+        first = False
+        if not lines:
+            continue
+
+        lineno, attr, dn = lines.pop(0)
+        if attr is None or attr.lower() != 'dn':
+            raise ValueError(f"line {lineno}: expected 'dn:' to start the record")
+        if lines and lines[0][1] is not None and lines[0][1].lower() == 'control':
+            raise ValueError(f"line {lines[0][0]}: LDIF controls are not supported")
+        changetype = 'add'
+        if lines and lines[0][1] is not None and lines[0][1].lower() == 'changetype':
+            changetype = lines.pop(0)[2]
+
+        if changetype == 'modify':
+            yield dn, changetype, _parse_modifications(dn, lines)
+            continue
+        for lineno, attr, value in lines:
+            if attr is None:
+                raise ValueError(f"line {lineno}: '-' outside a modify record for {dn}")
+        if changetype == 'add':
+            entry = {}
+            for lineno, attr, value in lines:
+                entry.setdefault(attr, []).append(value)
+            yield dn, changetype, entry
+        else:
+            yield dn, changetype, None
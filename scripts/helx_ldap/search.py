@@ -0,0 +1,11 @@
+"""
+Helpers for paged searches and their responses.
+"""
+
+# Number of entries the server returns per page of search results; no more
+# than OpenLDAP's default size limit of 500 entries
+PAGE_SIZE = 500
+
+def as_list(value):
+    """Return an attribute value from a search response as a list of values."""
+    return value if isinstance(value, list) else [value]
@@ -0,0 +1,26 @@
+"""
+Construction of the ldap3 Server objects the scripts connect to.
+"""
+
+import functools
+from urllib.parse import urlparse
+from ldap3 import Server, NONE
+
+@functools.lru_cache(maxsize=16)
+def make_server(ldap_server_url):
+    """
+    Return the Server for an LDAP URL, parsing the URL only once per process.
+
+    The port defaults to 389, or 636 for an ldaps:// URL. Schema and DSA info
+    are not read on bind, since none of the scripts need them.
+
+    Args:
+        ldap_server_url (str): The URL of the LDAP server (e.g., ldap://localhost).
+
+    Returns:
+        ldap3.Server: The server, shared by every caller passing the same URL.
+    """
+
+    parsed_url = urlparse(ldap_server_url)
+    use_ssl = parsed_url.scheme == 'ldaps'
+    return Server(parsed_url.hostname, port=parsed_url.port, use_ssl=use_ssl, get_info=NONE)
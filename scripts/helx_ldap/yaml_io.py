@@ -0,0 +1,11 @@
+"""
+The PyYAML loader and dumper used by the scripts.
+
+libyaml's C implementation is used when PyYAML provides it, and the pure-Python
+one otherwise; both only handle standard YAML tags.
+"""
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+"""
+Single entry point for the HeLx LDAP scripts.
+
+Each script is available as a subcommand taking the same arguments as the
+script itself, e.g. `helx_ldap_cli.py get-users --output-format yaml`. The
+helx_ldap_config.yaml file is loaded once, and the scripts' `run` functions
+are called in this process, so a driver invoking several of them can also
+import this module and call `run_command` repeatedly.
+"""
+
+import argparse
+import apply_ldif_files
+import delete_ldap_dn
+import get_ldap_dn
+import get_ldap_users
+import set_ldap_users
+from helx_ldap.config import load_ldap_config
+
+# The script run by each subcommand
+COMMANDS = {
+    'apply-ldifs': apply_ldif_files,
+    'delete-dn': delete_ldap_dn,
+    'get-dns': get_ldap_dn,
+    'get-users': get_ldap_users,
+    'set-users': set_ldap_users,
+}
+
+def build_parser():
+    """
+    Build the argument parser, with one subcommand per script.
+
+    Returns:
+        argparse.ArgumentParser: The parser; the chosen subcommand is stored as `command`.
+    """
+
+    parser = argparse.ArgumentParser(description='Manage a HeLx LDAP directory.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name, module in COMMANDS.items():
+        subparser = subparsers.add_parser(name, help=module.DESCRIPTION, description=module.DESCRIPTION)
+        module.add_arguments(subparser)
+    return parser
+
+def run_command(argv, config):
+    """
+    Parse the arguments of one subcommand and run it.
+
+    Args:
+        argv (list): The subcommand and its arguments, e.g. ['get-dns', '--search-base', 'dc=example,dc=org'].
+        config (dict or None): The helx_ldap_config.yaml configuration, or None if there is none.
+    """
+
+    args = build_parser().parse_args(argv)
+    COMMANDS[args.command].run(args, config)
+
+def main():
+    """
+    Main function to run the subcommand given on the command line.
+    """
+
+    run_command(None, load_ldap_config())
+
+if __name__ == "__main__":
+    main()
@@ -1,193 +1,421 @@
 #!/usr/bin/env python
 
-from ldap3 import Server, Connection, ALL, MODIFY_ADD, MODIFY_REPLACE
-from ldap3.core.exceptions import LDAPException
+from ldap3 import Connection, BASE, SUBTREE, RESTARTABLE, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE
+from ldap3.core.exceptions import LDAPException, LDAPBindError
+from ldap3.core.results import RESULT_ENTRY_ALREADY_EXISTS
 import yaml
 import argparse
-from urllib.parse import urlparse
+import collections
+import logging
 import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor
+from helx_ldap.config import load_ldap_config
+from helx_ldap.connections import ThreadConnections
+from helx_ldap.search import PAGE_SIZE, as_list
+from helx_ldap.server import make_server
+from helx_ldap.yaml_io import SafeLoader
+
+# Shown by --help, here and for the helx_ldap_cli subcommand
+DESCRIPTION = 'Create LDAP users from a YAML file.'
+
+# Progress and errors are reported through this logger, which run sends to stdout
+log = logging.getLogger('set_ldap_users')
+
+# Attempts to reopen a dropped worker connection, and seconds between them; kept
+# low, instead of ldap3's 30 tries 2 seconds apart, so an unreachable server is
+# reported within seconds
+RESTARTABLE_TRIES = 3
+RESTARTABLE_SLEEP_TIME = 1
+
+# Object classes of every user entry
+_OBJECTCLASS = ('inetOrgPerson', 'organizationalPerson', 'person', 'kubernetesSC', 'top')
+
+# Optional string attributes of a user entry, and the user's YAML keys for each, in order of precedence
+_ATTR_SPEC = (
+    ('mail', ('mail', 'email')),
+    ('telephoneNumber', ('telephoneNumber',)),
+    ('o', ('o',)),
+    ('ou', ('ou',)),
+    ('givenName', ('givenName',)),
+    ('displayName', ('displayName',)),
+)
+
+# Optional numeric attributes of a user entry, which kubernetesSC allows but does not require
+_ID_ATTRS = ('runAsUser', 'runAsGroup', 'fsGroup')
+
+# Attributes create_ldap_user sets and compares on a user entry; keep in sync
+# with the attrs it builds, since only these are fetched for existing users
+USER_ATTRIBUTES = [
+    'objectClass', 'uid', 'cn', 'sn', 'mail', 'telephoneNumber',
+    'o', 'ou', 'givenName', 'displayName',
+    'supplementalGroups', 'runAsUser', 'runAsGroup', 'fsGroup'
+]
+
+def ensure_group_base_dn_exists(conn, group_base, dry_run=False):
+    """
+    Ensure the group base DN exists in the LDAP directory. If it doesn't exist, create it.
+
+    The entry is added unconditionally, an "already exists" result meaning it
+    is there, so the common case takes a single request. Only if the add fails
+    otherwise, e.g. for lack of write access to the parent, is the entry looked up.
+
+    Args:
+        conn (ldap3.Connection): An active LDAP connection.
+        group_base (str): The base DN for the group.
+        dry_run (bool): Only look the entry up, logging that it would be created if it is missing.
 
-def load_ldap_config(config_file="helx_ldap_config.yaml"):
+    Returns:
+        bool: True if the group base DN exists or is successfully created, False otherwise.
     """
-    Load LDAP configuration from a YAML file if it exists.
+
+    if dry_run:
+        if not conn.search(group_base, '(objectClass=*)', search_scope=BASE, attributes=['1.1']):
+            log.info("Would create group base DN: %s", group_base)
+        return True
+
+    attrs = {
+        'objectClass': ['top', 'organizationalUnit'],
+        'ou': group_base.split(',')[0].split('=')[1]
+    }
+    if conn.add(group_base, attributes=attrs):
+        log.info("Created group base DN: %s", group_base)
+        return True
+    if conn.result['result'] == RESULT_ENTRY_ALREADY_EXISTS:
+        return True
+
+    description = conn.result['description']
+    if conn.search(group_base, '(objectClass=*)', search_scope=BASE, attributes=['1.1']):
+        return True
+    log.error("Failed to create group base DN %s: %s", group_base, description)
+    return False
+
+def search_entries(conn, search_base, search_filter, attributes):
+    """
+    Search a subtree one page at a time, so the server's size limit is never hit.
 
     Args:
-        config_file (str): Path to the YAML configuration file.
+        conn (ldap3.Connection): An active LDAP connection.
+        search_base (str): The base DN where the search starts.
+        search_filter (str): The LDAP filter the entries must match.
+        attributes (list): The attributes to return.
+
+    Yields:
+        tuple: The lower-cased DN of each entry and its attributes, as lists of values.
+    """
+
+    entries = conn.extend.standard.paged_search(
+        search_base,
+        search_filter,
+        search_scope=SUBTREE,
+        attributes=attributes,
+        paged_size=PAGE_SIZE,
+        generator=True
+    )
+    for entry in entries:
+        if entry['type'] == 'searchResEntry':
+            yield entry['dn'].lower(), {attr: as_list(value) for attr, value in entry['attributes'].items()}
+
+def fetch_existing_users(conn, user_base):
+    """
+    Fetch the users already in the LDAP directory with a single search.
+
+    Args:
+        conn (ldap3.Connection): An active LDAP connection.
+        user_base (str): The base DN where the users are located.
 
     Returns:
-        dict: Dictionary of LDAP configuration data if the file exists, otherwise None.
+        dict: The USER_ATTRIBUTES of each existing user, keyed by lower-cased DN.
     """
 
-    if os.path.exists(config_file):
-        with open(config_file, "r") as file:
-            return yaml.safe_load(file)
-    return None
+    return dict(search_entries(conn, user_base, '(objectClass=inetOrgPerson)', USER_ATTRIBUTES))
 
-def ensure_group_base_dn_exists(conn, group_base):
+def fetch_existing_groups(conn, group_base):
     """
-    Ensure the group base DN exists in the LDAP directory. If it doesn't exist, create it.
+    Fetch the groups already in the LDAP directory with a single search.
 
     Args:
         conn (ldap3.Connection): An active LDAP connection.
-        group_base (str): The base DN for the group.
+        group_base (str): The base DN where the groups are located.
 
     Returns:
-        bool: True if the group base DN exists or is successfully created, False otherwise.
+        dict: The set of lower-cased member DNs of each existing group, keyed by lower-cased DN.
     """
 
-    if not conn.search(group_base, '(objectClass=*)', search_scope='BASE'):
-        attrs = {
-            'objectClass': ['top', 'organizationalUnit'],
-            'ou': group_base.split(',')[0].split('=')[1]
-        }
-        if conn.add(group_base, attributes=attrs):
-            print(f"Created group base DN: {group_base}")
+    return {
+        group_dn: {member.lower() for member in attributes.get('member', [])}
+        for group_dn, attributes in search_entries(conn, group_base, '(objectClass=groupOfNames)', ['member'])
+    }
+
+def diff_user_attributes(attrs, existing_attrs):
+    """
+    Compute the modifications that turn an existing user entry into the desired one.
+
+    Values are compared as tuples, so an unchanged attribute costs a single
+    comparison. Multi-valued attributes that differ are updated with the
+    values added and removed; others are replaced. Attributes the user does
+    not set are left as they are on the entry.
+
+    Args:
+        attrs (dict): The desired attributes of the user, with string values.
+        existing_attrs (dict): The USER_ATTRIBUTES of the existing entry, as lists of values.
+
+    Returns:
+        dict: The modifications for conn.modify, empty if the entry is up to date.
+    """
+
+    modifications = {}
+    for attr, new_value in attrs.items():
+        if isinstance(new_value, (list, tuple)):
+            new_values = tuple(new_value)
         else:
-            print(f"Failed to create group base DN {group_base}: {conn.result['description']}")
-            return False
-    return True
+            new_values = (new_value,)
+        old_values = tuple(existing_attrs.get(attr, ()))
+        if new_values == old_values:
+            continue
+
+        if isinstance(new_value, (list, tuple)):
+            # Send only the values added and removed, not the whole list
+            added = frozenset(new_values).difference(old_values)
+            removed = frozenset(old_values).difference(new_values)
+            changes = []
+            if added:
+                changes.append((MODIFY_ADD, list(added)))
+            if removed:
+                changes.append((MODIFY_DELETE, list(removed)))
+            if changes:
+                modifications[attr] = changes
+        else:
+            modifications[attr] = [(MODIFY_REPLACE, list(new_values))]
+    return modifications
 
-def create_ldap_user(user, ldap_config):
+def create_ldap_user(user, conn, user_base, existing_users, dry_run=False):
     """
-    Create or update an LDAP user and manage group memberships.
+    Create or update an LDAP user.
 
     This function creates a new LDAP user if they don't exist or updates the user's 
-    attributes if they already exist. It also handles assigning the user to LDAP groups.
+    attributes if they already exist. Group memberships are handled afterwards, 
+    for all users at once, by update_group.
 
     Args:
         user (dict): Dictionary containing user details such as UID, CN, SN, and groups.
-        ldap_config (dict): Dictionary containing LDAP configuration details such as 
-                            LDAP server URL, bind DN, and base DNs.
+        conn (ldap3.Connection): An active LDAP connection, reused across users.
+        user_base (str): The base DN where the users are created.
+        existing_users (dict): Attributes of the users already in the directory, keyed by lower-cased DN.
+        dry_run (bool): Log the changes that would be made instead of making them.
 
     Returns:
         None
     """
 
-    conn = None
     try:
-        parsed_url = urlparse(ldap_config['ldap_server'])
-        host = parsed_url.hostname
-        port = parsed_url.port if parsed_url.port else (636 if parsed_url.scheme == 'ldaps' else 389)
-        use_ssl = parsed_url.scheme == 'ldaps'
-
-        # Connect to the LDAP server
-        server = Server(host, port=port, use_ssl=use_ssl, get_info=ALL)
-        conn = Connection(server, user=ldap_config['bind_dn'], password=ldap_config['bind_password'], auto_bind=True)
-
-        # Ensure the group base DN exists
-        group_base = ldap_config.get('group_base', 'ou=groups,dc=example,dc=org')
-        if not ensure_group_base_dn_exists(conn, group_base):
-            print(f"Cannot proceed without group base DN: {group_base}")
-            return
-
         # Create or update the user
-        user_dn = f"uid={user['uid']},{ldap_config['user_base']}"
-        attrs = {
-            'objectClass': ['inetOrgPerson', 'organizationalPerson', 'person', 'kubernetesSC', 'top'],
-            'uid': user['uid'],
-            'cn': user['cn'],
-            'sn': user['sn'],
-            'mail': user.get('email', ''),
-            'telephoneNumber': user.get('telephoneNumber', ''),
-            'o': user.get('o', ''),
-            'ou': user.get('ou', ''),
-            'givenName': user.get('givenName', ''),
-            'displayName': user.get('displayName', ''),
-            'supplementalGroups': [str(group) for group in user.get('supplementalGroups', [])],
-            'runAsUser': str(user['runAsUser']),
-            'runAsGroup': str(user['runAsGroup']),
-            'fsGroup': str(user['fsGroup'])
-        }
+        user_dn = f"uid={user['uid']},{user_base}"
+        # Every value is made a string once here, as the server returns it, so the
+        # diff can compare the values directly
+        attrs = {'objectClass': _OBJECTCLASS, 'uid': str(user['uid']), 'cn': str(user['cn']), 'sn': str(user['sn'])}
+
+        # Leave out optional attributes the user does not set, rather than sending empty values
+        for attr, keys in _ATTR_SPEC:
+            value = next((user[key] for key in keys if user.get(key)), None)
+            if value:
+                attrs[attr] = str(value)
+        if user.get('supplementalGroups'):
+            attrs['supplementalGroups'] = [str(group) for group in user['supplementalGroups']]
+        for attr in _ID_ATTRS:
+            if user.get(attr) not in (None, ''):
+                attrs[attr] = str(user[attr])
 
         # Check if the user already exists
-        if conn.search(user_dn, '(objectClass=*)', search_scope='BASE', attributes=['*']):
-            existing_entry = conn.entries[0]
-            existing_attrs = existing_entry.entry_attributes_as_dict
-            modifications = {}
-
+        existing_attrs = existing_users.get(user_dn.lower())
+        if existing_attrs is not None:
             # Compare and update attributes
-            for attr, new_value in attrs.items():
-                existing_value = existing_attrs.get(attr, [])
-                if isinstance(new_value, list):
-                    if set(new_value) != set(existing_value):
-                        modifications[attr] = [(MODIFY_REPLACE, new_value)]
-                else:
-                    if new_value != (existing_value[0] if existing_value else ''):
-                        modifications[attr] = [(MODIFY_REPLACE, [new_value])]
-            if modifications:
+            modifications = diff_user_attributes(attrs, existing_attrs)
+            if modifications and dry_run:
+                log.info("Would update user %s: %s", user['uid'], modifications)
+            elif modifications:
                 if conn.modify(user_dn, modifications):
-                    print(f"User {user['uid']} updated successfully.")
+                    log.info("User %s updated successfully.", user['uid'])
                 else:
-                    print(f"Failed to update user {user['uid']}: {conn.result['description']}")
+                    log.error("Failed to update user %s: %s", user['uid'], conn.result['description'])
             else:
-                print(f"No updates necessary for user {user['uid']}.")
+                log.info("No updates necessary for user %s.", user['uid'])
+        elif dry_run:
+            log.info("Would create user %s: %s", user['uid'], attrs)
         else:
             if conn.add(user_dn, attributes=attrs):
-                print(f"User {user['uid']} created successfully.")
+                log.info("User %s created successfully.", user['uid'])
             else:
-                print(f"Failed to create user {user['uid']}: {conn.result['description']}")
-
-        # Handle group memberships
-        user_groups = user.get('groups', [])
-        for group_name in user_groups:
-            group_dn = f"cn={group_name},{group_base}"
-            if not conn.search(group_dn, '(objectClass=groupOfNames)', search_scope='BASE', attributes=['member']):
-                group_attrs = {'objectClass': ['groupOfNames', 'top'], 'cn': group_name, 'member': [user_dn]}
-                if conn.add(group_dn, attributes=group_attrs):
-                    print(f"Group {group_name} created and user {user['uid']} added as member.")
-                else:
-                    print(f"Failed to create group {group_name}: {conn.result['description']}")
+                log.error("Failed to create user %s: %s", user['uid'], conn.result['description'])
+
+    except LDAPException as e:
+        log.error("Error in creating user %s: %s", user['uid'], e)
+
+def update_group(conn, group_name, uids, user_base, group_base, existing_groups, dry_run=False):
+    """
+    Add users to an LDAP group, creating the group if it doesn't exist.
+
+    The group is created or modified with a single request carrying all of
+    its new members, instead of one request per user.
+
+    Args:
+        conn (ldap3.Connection): An active LDAP connection.
+        group_name (str): The CN of the group.
+        uids (list): The UIDs of the users who should be members of the group.
+        user_base (str): The base DN where the users are located.
+        group_base (str): The base DN where the groups are located.
+        existing_groups (dict): The lower-cased member DNs of the groups already in the 
+                                directory, keyed by lower-cased DN.
+        dry_run (bool): Log the changes that would be made instead of making them.
+
+    Returns:
+        None
+    """
+
+    group_dn = f"cn={group_name},{group_base}"
+    user_dns = {f"uid={uid},{user_base}": uid for uid in uids}
+    members = existing_groups.get(group_dn.lower())
+
+    try:
+        if members is None:
+            if dry_run:
+                log.info("Would create group %s with members: %s", group_name, ', '.join(user_dns.values()))
+                return
+            group_attrs = {'objectClass': ['groupOfNames', 'top'], 'cn': group_name, 'member': list(user_dns)}
+            if conn.add(group_dn, attributes=group_attrs):
+                for uid in user_dns.values():
+                    log.info("Group %s created and user %s added as member.", group_name, uid)
             else:
-                group_entry = conn.entries[0]
-                if user_dn not in group_entry.member:
-                    if conn.modify(group_dn, {'member': [(MODIFY_ADD, [user_dn])]}):
-                        print(f"User {user['uid']} added to group {group_name}.")
-                    else:
-                        print(f"Failed to add user {user['uid']} to group {group_name}: {conn.result['description']}")
-                else:
-                    print(f"User {user['uid']} is already a member of group {group_name}.")
+                log.error("Failed to create group %s: %s", group_name, conn.result['description'])
+            return
 
+        new_members = [user_dn for user_dn in user_dns if user_dn.lower() not in members]
+        for user_dn, uid in user_dns.items():
+            if user_dn not in new_members:
+                log.info("User %s is already a member of group %s.", uid, group_name)
+        if not new_members:
+            return
+        if dry_run:
+            log.info("Would add users to group %s: %s", group_name, ', '.join(user_dns[user_dn] for user_dn in new_members))
+            return
+        if conn.modify(group_dn, {'member': [(MODIFY_ADD, new_members)]}):
+            for user_dn in new_members:
+                log.info("User %s added to group %s.", user_dns[user_dn], group_name)
+        else:
+            log.error("Failed to add users to group %s: %s", group_name, conn.result['description'])
     except LDAPException as e:
-        print(f"Error in creating user {user['uid']}: {e}")
-    finally:
-        if conn:
-            conn.unbind()
+        log.error("Error in updating group %s: %s", group_name, e)
 
-def load_users_from_yaml(path):
+def iter_users_from_yaml(path):
     """
-    Load user data from a YAML file.
+    Read the users from a YAML file, yielding them as they are parsed.
+
+    The file is either a single document with a `users` list, or a stream of
+    documents separated by `---`, each a single user. The documents are parsed
+    one at a time, so with the second layout a large file is never held in
+    memory and users are provisioned while the rest of the file is read.
 
     Args:
         path (str): Path to the YAML file.
 
-    Returns:
-        dict: Parsed user data from the YAML file.
+    Yields:
+        dict: The details of each user.
     """
 
-    with open(path, 'r') as file:
-        return yaml.safe_load(file)
+    # Read bytes, which libyaml decodes itself
+    with open(path, 'rb') as file:
+        for document in yaml.load_all(file, Loader=SafeLoader):
+            if not document:
+                continue
+            if 'users' in document:
+                yield from document['users'] or []
+            else:
+                yield document
 
-def main():
+def map_bounded(executor, fn, iterable, limit):
     """
-    Main function to create LDAP users from a YAML file and manage their groups.
+    Like executor.map, but taking items from the iterable only as results are consumed.
 
-    Parses command-line arguments and processes each user entry from the YAML file.
-    It uses command-line arguments or configuration file settings for the LDAP 
-    server connection details.
+    executor.map submits the whole iterable at once, so a generator is read to
+    the end, and all its items held in memory, before the first result.
+
+    Args:
+        executor (concurrent.futures.Executor): The executor running the calls.
+        fn (callable): The function called with each item.
+        iterable (iterable): The items.
+        limit (int): The maximum number of items submitted and not yet consumed.
+
+    Yields:
+        The result of each call, in the order of the items.
+    """
+
+    pending = collections.deque()
+    for item in iterable:
+        if len(pending) >= limit:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+def add_arguments(parser):
+    """
+    Add the command-line arguments for creating users to a parser.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser of this script, or of a helx_ldap_cli subcommand.
     """
 
-    parser = argparse.ArgumentParser(description='Create LDAP users from a YAML file.')
     parser.add_argument('yaml_file', help='Path to YAML file with user data')
     parser.add_argument('--ldap-server', help='LDAP server URL, e.g., ldap://localhost')
     parser.add_argument('--bind-dn', help='Bind DN for LDAP authentication')
-    parser.add_argument('--bind-password', help='Password for Bind DN')
+    parser.add_argument('--bind-password', default=os.environ.get('HELX_LDAP_BIND_PASSWORD'),
+                        help='Password for Bind DN (default: $HELX_LDAP_BIND_PASSWORD)')
     parser.add_argument('--user-base', help='Base DN where the users will be created')
     parser.add_argument('--group-base', help='Base DN where the groups are located')
+    parser.add_argument('--parallel', type=int, default=8, help='Maximum number of users created or updated concurrently (default: 8)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Report the users and groups that would be created or updated, without changing the directory')
+
+def run(args, config):
+    """
+    Create or update the users of a YAML file and add them to their groups.
+
+    Connection details and base DNs missing from the arguments are taken from the configuration.
+    Messages are queued by the worker threads and written to stdout by a single
+    listener thread, so the workers never wait on stdout or on each other to report.
 
-    args = parser.parse_args()
+    Args:
+        args (argparse.Namespace): The arguments added by add_arguments, parsed.
+        config (dict or None): The helx_ldap_config.yaml configuration, or None if there is none.
+    """
 
-    # Load configuration from file, if available
-    config = load_ldap_config()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    listener = QueueListener(log_queue, stream_handler)
+
+    log.addHandler(queue_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+    listener.start()
+    try:
+        sync_users(args, config)
+    finally:
+        # Write out the queued messages before returning
+        listener.stop()
+        log.removeHandler(queue_handler)
+
+def sync_users(args, config):
+    """
+    Create or update the users of a YAML file and add them to their groups, as described for run.
+
+    Args:
+        args (argparse.Namespace): The arguments added by add_arguments, parsed.
+        config (dict or None): The helx_ldap_config.yaml configuration, or None if there is none.
+    """
 
     # Use command-line arguments or fallback to config file
     ldap_config = {
@@ -199,12 +427,82 @@ def main():
     }
 
     if not ldap_config['ldap_server'] or not ldap_config['bind_password']:
-        print("Error: LDAP server URL and bind password are required.")
+        log.error("Error: LDAP server URL and bind password are required.")
         return
 
-    users = load_users_from_yaml(args.yaml_file)
-    for user in users['users']:
-        create_ldap_user(user, ldap_config)
+    server = make_server(ldap_config['ldap_server'])
+    user_base = ldap_config['user_base']
+    group_base = ldap_config['group_base']
+
+    def connect():
+        # A dropped connection is reopened and rebound, instead of failing the worker's remaining
+        # users; the retries are bounded before the first bind, which is retried the same way
+        conn = Connection(server, user=ldap_config['bind_dn'], password=ldap_config['bind_password'],
+                          client_strategy=RESTARTABLE)
+        conn.strategy.restartable_tries = RESTARTABLE_TRIES
+        conn.strategy.restartable_sleep_time = RESTARTABLE_SLEEP_TIME
+        if not conn.bind():
+            raise LDAPBindError(conn.last_error)
+        return conn
+
+    connections = ThreadConnections(connect)
+    get_conn = connections.get
+
+    def create_worker(user):
+        create_ldap_user(user, get_conn(), user_base, existing_users, args.dry_run)
+
+    def collect_groups(users):
+        # Record the members of each group while passing the users through, so every group is updated once
+        for user in users:
+            for group_name in user.get('groups', []):
+                group_additions.setdefault(group_name, []).append(user['uid'])
+            yield user
+
+    def group_worker(group):
+        group_name, uids = group
+        update_group(get_conn(), group_name, uids, user_base, group_base, existing_groups, args.dry_run)
+
+    try:
+        with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+            # Fetch the existing users and groups once, instead of probing for each user. The
+            # searches run on worker connections, overlapping each other, the check of the
+            # group base DN and the binds of the workers
+            users_future = executor.submit(lambda: fetch_existing_users(get_conn(), user_base))
+
+            # Ensure the group base DN exists
+            if not ensure_group_base_dn_exists(get_conn(), group_base, args.dry_run):
+                log.error("Cannot proceed without group base DN: %s", group_base)
+                return
+
+            groups_future = executor.submit(lambda: fetch_existing_groups(get_conn(), group_base))
+            existing_users = users_future.result()
+            existing_groups = groups_future.result()
+            group_additions = {}
+
+            # Create or update the users concurrently, each worker reusing its own connection;
+            # users are parsed as the workers take them, at most two per worker ahead
+            users = collect_groups(iter_users_from_yaml(args.yaml_file))
+            list(map_bounded(executor, create_worker, users, 2 * args.parallel))
+
+            # Then update the groups concurrently, once all their members exist
+            list(executor.map(group_worker, group_additions.items()))
+    except LDAPException as e:
+        log.error("LDAP error: %s", e)
+    finally:
+        connections.unbind_all()
+
+def main():
+    """
+    Main function to create LDAP users from a YAML file and manage their groups.
+
+    Parses command-line arguments and processes each user entry from the YAML file.
+    It uses command-line arguments or configuration file settings for the LDAP 
+    server connection details.
+    """
+
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    add_arguments(parser)
+    run(parser.parse_args(), load_ldap_config())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,194 @@
+"""
+Tests of the LDIF parser in scripts/helx_ldap/ldif.py.
+
+Run from the repository root with `python -m unittest discover test`.
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from helx_ldap.ldif import parse_records
+
+def parse(text):
+    """Parse LDIF given as text, returning the list of records."""
+    return list(parse_records(io.BytesIO(text.encode('utf-8'))))
+
+class ParseRecordsTest(unittest.TestCase):
+
+    def test_content_record(self):
+        self.assertEqual(parse(
+            "dn: cn=a,dc=example,dc=org\n"
+            "objectClass: top\n"
+            "objectClass: person\n"
+            "cn: a\n"
+        ), [('cn=a,dc=example,dc=org', 'add', {'objectClass': ['top', 'person'], 'cn': ['a']})])
+
+    def test_change_records(self):
+        self.assertEqual(parse(
+            "dn: cn=a,dc=example,dc=org\n"
+            "changetype: add\n"
+            "cn: a\n"
+            "\n"
+            "dn: cn=b,dc=example,dc=org\n"
+            "changetype: delete\n"
+        ), [
+            ('cn=a,dc=example,dc=org', 'add', {'cn': ['a']}),
+            ('cn=b,dc=example,dc=org', 'delete', None),
+        ])
+
+    def test_unsupported_changetype_is_returned(self):
+        self.assertEqual(parse(
+            "dn: cn=a,dc=example,dc=org\n"
+            "changetype: modrdn\n"
+            "newrdn: cn=b\n"
+        ), [('cn=a,dc=example,dc=org', 'modrdn', None)])
+
+    def test_folded_lines(self):
+        self.assertEqual(parse(
+            "dn: cn=schema,cn=co\n"
+            " nfig\n"
+            "changetype: modify\n"
+            "add: olcAttributeTypes\n"
+            "olcAttributeTypes: ( 2.25.1\n"
+            "  NAME 'runAsUser' )\n"
+        ), [('cn=schema,cn=config', 'modify', [('add', 'olcAttributeTypes', ["( 2.25.1 NAME 'runAsUser' )"])])])
+
+    def test_comments_and_their_continuations(self):
+        self.assertEqual(parse(
+            "# a comment\n"
+            " continuing the comment\n"
+            "dn: cn=a,dc=example,dc=org\n"
+            "# inside the record\n"
+            " cn: not an attribute\n"
+            "cn: a\n"
+        ), [('cn=a,dc=example,dc=org', 'add', {'cn': ['a']})])
+
+    def test_version_on_its_own(self):
+        self.assertEqual(parse(
+            "version: 1\n"
+            "\n"
+            "dn: cn=a,dc=example,dc=org\n"
+            "cn: a\n"
+        ), [('cn=a,dc=example,dc=org', 'add', {'cn': ['a']})])
+
+    def test_version_in_the_first_record(self):
+        self.assertEqual(parse(
+            "version: 1\n"
+            "dn: cn=a,dc=example,dc=org\n"
+            "cn: a\n"
+        ), [('cn=a,dc=example,dc=org', 'add', {'cn': ['a']})])
+
+    def test_version_only_starts_the_file(self):
+        with self.assertRaisesRegex(ValueError, "line 4: expected 'dn:'"):
+            parse(
+                "dn: cn=a,dc=example,dc=org\n"
+                "cn: a\n"
+                "\n"
+                "version: 1\n"
+                "dn: cn=b,dc=example,dc=org\n"
+            )
+
+    def test_base64_values(self):
+        self.assertEqual(parse(
+            "dn:: Y249ZsO2byxkYz1leGFtcGxlLGRjPW9yZw==\n"
+            "cn:: ZsO2bw==\n"
+            "jpegPhoto:: /9j/\n"
+        ), [('cn=föo,dc=example,dc=org', 'add', {'cn': ['föo'], 'jpegPhoto': [b'\xff\xd8\xff']})])
+
+    def test_file_url_values(self):
+        with tempfile.NamedTemporaryFile(suffix='.txt', delete=False) as file:
+            file.write(b'from a file')
+        try:
+            self.assertEqual(parse(
+                "dn: cn=a,dc=example,dc=org\n"
+                f"description:< file://{file.name}\n"
+            ), [('cn=a,dc=example,dc=org', 'add', {'description': ['from a file']})])
+        finally:
+            os.unlink(file.name)
+
+    def test_modify_blocks_keep_their_order(self):
+        self.assertEqual(parse(
+            "dn: olcDatabase={1}mdb,cn=config\n"
+            "changetype: modify\n"
+            "delete: olcAccess\n"
+            "olcAccess: {0}to * by * read\n"
+            "-\n"
+            "add: olcAccess\n"
+            "olcAccess: {0}to attrs=userPassword by self write\n"
+            "olcAccess: {1}to * by * read\n"
+            "-\n"
+            "replace: olcSuffix\n"
+            "olcSuffix: dc=example,dc=org\n"
+            "-\n"
+            "delete: olcDbIndex\n"
+            "-\n"
+        ), [('olcDatabase={1}mdb,cn=config', 'modify', [
+            ('delete', 'olcAccess', ['{0}to * by * read']),
+            ('add', 'olcAccess', ['{0}to attrs=userPassword by self write', '{1}to * by * read']),
+            ('replace', 'olcSuffix', ['dc=example,dc=org']),
+            ('delete', 'olcDbIndex', []),
+        ])])
+
+    def test_modify_without_final_separator(self):
+        self.assertEqual(parse(
+            "dn: cn=module{0},cn=config\n"
+            "changetype: modify\n"
+            "add: olcModuleLoad\n"
+            "olcModuleLoad: memberof.so\n"
+        ), [('cn=module{0},cn=config', 'modify', [('add', 'olcModuleLoad', ['memberof.so'])])])
+
+    def test_crlf_line_endings(self):
+        self.assertEqual(parse(
+            "version: 1\r\n"
+            "dn: cn=a,dc=example,dc=org\r\n"
+            "changetype: modify\r\n"
+            "replace: description\r\n"
+            "description: folded\r\n"
+            "  value\r\n"
+            "-\r\n"
+            "\r\n"
+            "dn: cn=b,dc=example,dc=org\r\n"
+            "cn: b\r\n"
+        ), [
+            ('cn=a,dc=example,dc=org', 'modify', [('replace', 'description', ['folded value'])]),
+            ('cn=b,dc=example,dc=org', 'add', {'cn': ['b']}),
+        ])
+
+    def test_records_are_parsed_lazily(self):
+        records = parse_records(io.BytesIO(
+            b"dn: cn=a,dc=example,dc=org\n"
+            b"cn: a\n"
+            b"\n"
+            b"not ldif\n"
+        ))
+        self.assertEqual(next(records)[0], 'cn=a,dc=example,dc=org')
+        with self.assertRaises(ValueError):
+            next(records)
+
+    def test_errors(self):
+        cases = [
+            ("cn: a\n", "line 1: expected 'dn:'"),
+            ("dn: cn=a\nnot an attribute\n", "line 2: expected 'attribute: value'"),
+            ("dn: cn=a\n: no attribute\n", "line 2: expected 'attribute: value'"),
+            ("dn: cn=a\ncontrol: 1.2.840.113556.1.4.805 true\nchangetype: delete\n",
+             "line 2: LDIF controls are not supported"),
+            ("dn: cn=a\ncn: a\n-\n", "line 3: '-' outside a modify record"),
+            ("dn: cn=a\nchangetype: modify\n", "No modifications found for cn=a"),
+            ("dn: cn=a\nchangetype: modify\n-\n", "line 3: '-' without a modification"),
+            ("dn: cn=a\nchangetype: modify\nadd: cn\ncn: a\n-\n-\n", "line 6: '-' without a modification"),
+            ("dn: cn=a\nchangetype: modify\nincrement: uidNumber\n", "line 3: unknown modify operation 'increment'"),
+            ("dn: cn=a\nchangetype: modify\nadd: cn\nsn: a\n", "line 4: 'sn' in the 'add: cn' modification"),
+            ("dn: cn=a\ndescription:< http://example.org/x\n", "line 2: unsupported URL scheme"),
+        ]
+        for text, message in cases:
+            with self.subTest(text=text):
+                with self.assertRaisesRegex(ValueError, message):
+                    parse(text)
+
+if __name__ == '__main__':
+    unittest.main()